@@ -5,12 +5,61 @@ validation, and type safety. It handles all application settings including serve
 Ollama integration, database settings, security parameters, and logging configuration.
 """
 
+import functools
+import hashlib
+import json
 import os
-from typing import Optional, List, Dict
-from pydantic import validator, Field
-from pydantic_settings import BaseSettings
+import pickle
+import tempfile
+from functools import cached_property
+from dataclasses import make_dataclass
+from types import MappingProxyType
+from typing import Optional, List, Mapping, Tuple
+from urllib.parse import urlparse
+from pydantic import field_validator, model_validator, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 
+# Snapshot of the process environment taken once at import. Validators
+# consult this dict instead of calling os.getenv per attribute, which
+# rescans the environ block on every lookup.
+_ENV_SNAPSHOT = dict(os.environ)
+
+# Immutable module-level model constants. Referencing these by identity
+# from Field defaults avoids Pydantic copying mutable defaults on every
+# Config construction and guards against accidental mutation.
+_FALLBACK_MODELS = ("llama3", "mistral")
+
+# Kept as a list literal so startup.sh's grep-based model extraction
+# continues to work.
+_AVAILABLE_MODELS = ["llama3", "mistral", "phi3", "tinyllama"]
+
+# Security-header variants built once at import; get_security_headers()
+# just selects the right frozen mapping instead of allocating and
+# updating a dict per call.
+_SECURITY_HEADERS_DEV = MappingProxyType({
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "strict-origin-when-cross-origin"
+})
+
+_SECURITY_HEADERS_PROD = MappingProxyType({
+    **_SECURITY_HEADERS_DEV,
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Content-Security-Policy": "default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline';"
+})
+
+@functools.cache
+def get_model_descriptions() -> Mapping[str, str]:
+    """Model descriptions for UI display, loaded lazily from disk.
+
+    The descriptions live in model_descriptions.json next to this module
+    so processes that never render the UI don't pay for parsing or
+    holding the dict; the first caller loads it once.
+    """
+    path = Path(__file__).with_name("model_descriptions.json")
+    return MappingProxyType(json.loads(path.read_text(encoding="utf-8")))
+
 
 class Config(BaseSettings):
     """Application configuration with environment variable support and validation."""
@@ -40,33 +89,15 @@ class Config(BaseSettings):
     OLLAMA_CIRCUIT_BREAKER_THRESHOLD: int = Field(default=5, description="Circuit breaker failure threshold")
     OLLAMA_CIRCUIT_BREAKER_TIMEOUT: int = Field(default=60, description="Circuit breaker timeout in seconds")
     OLLAMA_MODEL_CACHE_TTL: int = Field(default=300, description="Model cache TTL in seconds")
+    MAX_CONCURRENT_LLM: int = Field(default=4, description="Maximum concurrent LLM generation tasks")
 
     # Model Configuration
     DEFAULT_MODEL: str = Field(default="llama3", description="Default model to use")
-    FALLBACK_MODELS: List[str] = Field(default=["llama3", "mistral"], description="Fallback models list")
-    
+    FALLBACK_MODELS: Tuple[str, ...] = Field(default=_FALLBACK_MODELS, description="Fallback models list")
+
     # Available models for UI and download (in alphabetical order)
-    AVAILABLE_MODELS: List[str] = Field(default=["llama3", "mistral", "phi3", "tinyllama"], 
-                                       description="Models available in UI and for download")
-
-    # Model descriptions for UI display
-    MODEL_DESCRIPTIONS: Dict[str, str] = Field(default={
-        "mistral": "Fast & versatile",
-        "llama3": "Meta's flagship",
-        "llama3.1": "Advanced reasoning",
-        "llama3.2": "Latest Meta model",
-        "llama2": "Reliable & stable",
-        "codellama": "Programming expert",
-        "phi3": "Microsoft's efficient model",
-        "gemma2": "Google's latest",
-        "qwen2.5": "Alibaba's multilingual",
-        "deepseek-coder": "Code specialist",
-        "nomic-embed-text": "Text embeddings",
-        "all-minilm": "Sentence embeddings",
-        "tinyllama": "Lightweight & fast",
-        "orca-mini": "Compact reasoning",
-        "vicuna": "Conversational AI"
-    }, description="Model descriptions for UI display")
+    AVAILABLE_MODELS: Tuple[str, ...] = Field(default_factory=lambda: tuple(_AVAILABLE_MODELS),
+                                              description="Models available in UI and for download")
 
 
     # ─────────────────────────────
@@ -79,18 +110,17 @@ class Config(BaseSettings):
     DATABASE_POOL_TIMEOUT: int = Field(default=30, description="Database pool timeout in seconds")
     DATABASE_CLEANUP_DAYS: int = Field(default=30, description="Days to keep old messages")
 
-    @validator('DATABASE_URL', pre=True)
-    def set_database_url(cls, v, values):
-        """Override DATABASE_URL if DB_PATH environment variable is set"""
-        db_path = os.getenv('DB_PATH')
+    @model_validator(mode="before")
+    @classmethod
+    def apply_env_overrides(cls, values):
+        """Apply DB_PATH/OLLAMA_URL environment variable overrides"""
+        db_path = _ENV_SNAPSHOT.get('DB_PATH')
         if db_path:
-            return f"sqlite:///{db_path}"
-        return v
-
-    @validator('OLLAMA_URL', pre=True)
-    def set_ollama_url(cls, v):
-        """Override OLLAMA_URL from environment variable"""
-        return os.getenv('OLLAMA_URL', v)
+            values['DATABASE_URL'] = f"sqlite:///{db_path}"
+        ollama_url = _ENV_SNAPSHOT.get('OLLAMA_URL')
+        if ollama_url:
+            values['OLLAMA_URL'] = ollama_url
+        return values
 
     # ─────────────────────────────
     # Security Configuration
@@ -131,6 +161,7 @@ class Config(BaseSettings):
     # Logging Configuration
     # ─────────────────────────────
     LOG_LEVEL: str = Field(default="INFO", description="Logging level")
+    LOG_LEVEL_INT: int = Field(default=20, description="Numeric logging level derived from LOG_LEVEL")
     LOG_FORMAT: str = Field(default="structured", description="Log format (structured/simple)")
     LOG_FILE_ENABLED: bool = Field(default=True, description="Enable file logging")
     LOG_FILE_PATH: str = Field(default="logs", description="Log file directory")
@@ -158,37 +189,42 @@ class Config(BaseSettings):
     ENABLE_COMPRESSION: bool = Field(default=True, description="Enable response compression")
 
     # pydantic prioritise .env file over hard coded values, can include a .env file next time with secret key as well
-    class Config: 
-        """Pydantic configuration."""
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True,
+        ignored_types=(cached_property,),
+    )
 
     # ─────────────────────────────
     # Validators
     # ─────────────────────────────
-    @validator("PORT")
+    @field_validator("PORT")
+    @classmethod
     def validate_port(cls, v):
         """Validate port number."""
         if not 1 <= v <= 65535:
             raise ValueError("Port must be between 1 and 65535")
         return v
 
-    @validator("OLLAMA_TIMEOUT")
+    @field_validator("OLLAMA_TIMEOUT")
+    @classmethod
     def validate_ollama_timeout(cls, v):
         """Validate Ollama timeout."""
         if v <= 0:
             raise ValueError("Ollama timeout must be positive")
         return v
 
-    @validator("OLLAMA_MAX_RETRIES")
+    @field_validator("OLLAMA_MAX_RETRIES")
+    @classmethod
     def validate_ollama_retries(cls, v):
         """Validate Ollama retry count."""
         if v < 0:
             raise ValueError("Ollama max retries must be non-negative")
         return v
 
-    @validator("LOG_LEVEL")
+    @field_validator("LOG_LEVEL")
+    @classmethod
     def validate_log_level(cls, v):
         """Validate log level."""
         valid_levels = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
@@ -196,7 +232,15 @@ class Config(BaseSettings):
             raise ValueError(f"Log level must be one of: {valid_levels}")
         return v.upper()
 
-    @validator("ENVIRONMENT")
+    @model_validator(mode="after")
+    def compute_log_level_int(self):
+        """Resolve LOG_LEVEL to its numeric constant once at validation time."""
+        import logging
+        self.LOG_LEVEL_INT = getattr(logging, self.LOG_LEVEL)
+        return self
+
+    @field_validator("ENVIRONMENT")
+    @classmethod
     def validate_environment(cls, v):
         """Validate environment."""
         valid_envs = ["development", "staging", "production"]
@@ -204,14 +248,16 @@ class Config(BaseSettings):
             raise ValueError(f"Environment must be one of: {valid_envs}")
         return v.lower()
 
-    @validator("MAX_REQUEST_SIZE")
+    @field_validator("MAX_REQUEST_SIZE")
+    @classmethod
     def validate_max_request_size(cls, v):
         """Validate maximum request size."""
         if v <= 0:
             raise ValueError("Max request size must be positive")
         return v
 
-    @validator("RATE_LIMIT_REQUESTS_PER_MINUTE")
+    @field_validator("RATE_LIMIT_REQUESTS_PER_MINUTE")
+    @classmethod
     def validate_rate_limit(cls, v):
         """Validate rate limit."""
         if v <= 0:
@@ -231,18 +277,20 @@ class Config(BaseSettings):
         """Check if running in development environment."""
         return self.ENVIRONMENT == "development"
 
-    @property
+    @cached_property
     def log_file_directory(self) -> Path:
         """Get log file directory path."""
         return Path(self.LOG_FILE_PATH)
 
-    @property
+    @cached_property
     def database_file_path(self) -> Optional[Path]:
         """Get database file path for SQLite databases."""
         if self.DATABASE_URL.startswith("sqlite"):
-            # Extract file path from SQLite URL
-            file_path = self.DATABASE_URL.replace("sqlite:///", "")
-            return Path(file_path)
+            # Parse once; stripping exactly one leading slash keeps
+            # sqlite:///relative.db relative and sqlite:////abs/path.db
+            # absolute, which str.replace("sqlite:///", "") mishandled.
+            path = urlparse(self.DATABASE_URL).path
+            return Path(path[1:]) if path.startswith("/") else Path(path)
         return None
 
     # ─────────────────────────────
@@ -250,13 +298,17 @@ class Config(BaseSettings):
     # ─────────────────────────────
     def create_directories(self) -> None:
         """Create necessary directories."""
-        # Create log directory
+        targets = []
         if self.LOG_FILE_ENABLED:
-            self.log_file_directory.mkdir(parents=True, exist_ok=True)
-
-        # Create database directory for SQLite
+            targets.append(self.log_file_directory)
         if self.database_file_path:
-            self.database_file_path.parent.mkdir(parents=True, exist_ok=True)
+            targets.append(self.database_file_path.parent)
+
+        for path in targets:
+            # One isdir stat in the warm case instead of the stat+mkdir
+            # syscall pair mkdir(exist_ok=True) always issues.
+            if not os.path.isdir(path):
+                path.mkdir(parents=True, exist_ok=True)
 
     def get_cors_config(self) -> dict:
         """Get CORS configuration."""
@@ -267,61 +319,227 @@ class Config(BaseSettings):
             "allow_credentials": True
         }
 
-    def get_security_headers(self) -> dict:
+    def get_security_headers(self) -> Mapping[str, str]:
         """Get security headers configuration."""
-        headers = {
-            "X-Content-Type-Options": "nosniff",
-            "X-Frame-Options": "DENY",
-            "X-XSS-Protection": "1; mode=block",
-            "Referrer-Policy": "strict-origin-when-cross-origin"
-        }
-
-        if self.is_production:
-            headers.update({
-                "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
-                "Content-Security-Policy": "default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline';"
-            })
+        return _SECURITY_HEADERS_PROD if self.is_production else _SECURITY_HEADERS_DEV
 
-        return headers
 
-    def validate_configuration(self) -> List[str]:
-        """Validate configuration and return list of warnings/errors."""
-        warnings = []
 
-        # Check production settings
-        if self.is_production:
-            if self.SECRET_KEY == "your-secret-key-change-in-production":
-                warnings.append("Using default secret key in production")
+# ─────────────────────────────
+# Parsed Config Disk Cache
+# ─────────────────────────────
+_CACHE_DIR = Path.home() / ".cache" / "ai_assistant"
+_CACHE_FILE = _CACHE_DIR / "config.pkl"
+
+
+def _cache_key() -> tuple:
+    """Cache key from the mtime+size of .env and this module, plus a
+    digest of the environment variables Config actually consumes.
+
+    Hashing only the relevant env subset means a changed override (e.g.
+    OLLAMA_URL) invalidates the cache, while unrelated environment
+    churn does not.
+    """
+    key = []
+    for path in (".env", __file__):
+        try:
+            st = os.stat(path)
+            key.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            key.append(None)
+
+    env_subset = {
+        name: _ENV_SNAPSHOT[name]
+        for name in Config.model_fields
+        if name in _ENV_SNAPSHOT
+    }
+    key.append(hashlib.blake2b(repr(sorted(env_subset.items())).encode()).hexdigest())
+    return tuple(key)
+
+
+def _load_parsed() -> Config:
+    """Load the validated Config, using the disk cache when fresh.
+
+    Full Pydantic parsing and validation only runs when .env or this
+    module changed since the cache was written; warm process starts are
+    a single file read plus key comparison. The cache is rewritten
+    atomically (tmp file + os.replace) on miss.
+    """
+    key = _cache_key()
+
+    try:
+        with open(_CACHE_FILE, "rb") as fh:
+            cached_key, data = pickle.load(fh)
+        if cached_key == key:
+            return Config.model_construct(**data)
+    except (OSError, pickle.PickleError, EOFError, ValueError, TypeError):
+        pass
+
+    parsed = Config()
+
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_CACHE_DIR)
+        with os.fdopen(fd, "wb") as fh:
+            pickle.dump((key, parsed.model_dump()), fh)
+        os.replace(tmp_path, _CACHE_FILE)
+    except OSError:
+        pass
+
+    return parsed
+
+
+def _validate_configuration(self) -> Tuple[str, ...]:
+    """Validate configuration and return a tuple of warnings/errors.
+
+    Straight-line single pass over the frozen config: each attribute is
+    read once into a local, membership checks use the precomputed
+    frozenset views, and the empty (common) result is the shared empty
+    tuple.
+    """
+    is_production = self.is_production
+    warnings = []
+
+    # Check production settings
+    if is_production:
+        if self.SECRET_KEY == "your-secret-key-change-in-production":
+            warnings.append("Using default secret key in production")
+
+        if self.DEBUG:
+            warnings.append("Debug mode enabled in production")
+
+        if "localhost" in self.allowed_hosts_set:
+            warnings.append("Localhost in allowed hosts for production")
 
-            if self.DEBUG:
-                warnings.append("Debug mode enabled in production")
+        if self.DATABASE_URL.startswith("sqlite"):
+            warnings.append("Using SQLite in production (consider PostgreSQL)")
 
-            if "localhost" in self.ALLOWED_HOSTS:
-                warnings.append("Localhost in allowed hosts for production")
+    # Check Ollama configuration
+    if not self.OLLAMA_URL.startswith(("http://", "https://")):
+        warnings.append("Invalid Ollama URL format")
 
-        # Check Ollama configuration
-        if not self.OLLAMA_URL.startswith(("http://", "https://")):
-            warnings.append("Invalid Ollama URL format")
+    return tuple(warnings)
 
-        # Check database configuration
-        if self.DATABASE_URL.startswith("sqlite") and self.is_production:
-            warnings.append("Using SQLite in production (consider PostgreSQL)")
 
-        return warnings
+# ─────────────────────────────
+# Frozen Runtime Configuration
+# ─────────────────────────────
+def _freeze(parsed: Config):
+    """Build an immutable, slotted snapshot of a validated Config.
+
+    Configuration is parsed exactly once at startup and never mutated
+    afterward, so the runtime object exposed as ``config`` is a frozen
+    dataclass with ``__slots__``: attribute reads on hot paths are plain
+    slot loads instead of Pydantic descriptor dispatch, and the instance
+    carries no ``__dict__``. The mutable ``Config`` class is kept only
+    for parsing and validation.
+    """
+    data = {name: getattr(parsed, name) for name in parsed.model_fields}
+
+    # Environment checks become precomputed booleans instead of
+    # per-access string comparisons.
+    data["is_production"] = parsed.ENVIRONMENT == "production"
+    data["is_development"] = parsed.ENVIRONMENT == "development"
+
+    # Derived values are computed exactly once here; the former
+    # properties recomputed string parsing, Path construction and dict
+    # allocation on every access.
+    # Frozenset views for O(1) membership checks; the list forms are kept
+    # for consumers (e.g. Starlette) that require ordered sequences.
+    data["allowed_hosts_set"] = frozenset(parsed.ALLOWED_HOSTS)
+    data["cors_origins_set"] = frozenset(parsed.CORS_ORIGINS)
+    data["cors_methods_set"] = frozenset(parsed.CORS_METHODS)
+    data["available_models_set"] = frozenset(parsed.AVAILABLE_MODELS)
+    data["fallback_models_set"] = frozenset(parsed.FALLBACK_MODELS)
+
+    data["log_file_directory"] = parsed.log_file_directory
+    data["database_file_path"] = parsed.database_file_path
+    data["security_headers"] = parsed.get_security_headers()
+    data["cors_config"] = MappingProxyType(parsed.get_cors_config())
+
+    frozen_cls = make_dataclass(
+        "FrozenConfig",
+        [(name, type(value)) for name, value in data.items()],
+        frozen=True,
+        slots=True,
+        namespace={
+            # Reuse the existing implementations; they only read fields
+            # that exist on the frozen instance as well.
+            "create_directories": Config.create_directories,
+            "validate_configuration": _validate_configuration,
+            # Kept as methods for API compatibility; they now return the
+            # precomputed read-only mappings.
+            "get_security_headers": lambda self: self.security_headers,
+            "get_cors_config": lambda self: self.cors_config,
+        },
+    )
+    return frozen_cls(**data)
 
 
 # ─────────────────────────────
 # Global Configuration Instance
 # ─────────────────────────────
-config = Config()
-
-# Create necessary directories on import
-config.create_directories()
-
-# Validate configuration and log warnings
-warnings = config.validate_configuration()
-if warnings:
-    import logging
-    logger = logging.getLogger(__name__)
-    for warning in warnings:
-        logger.warning(f"Configuration warning: {warning}")
\ No newline at end of file
+config = _freeze(_load_parsed())
+
+# ─────────────────────────────
+# Module-Level Constant Exports
+# ─────────────────────────────
+# Every validated field is also exported as a module-level constant so
+# hot paths can bind values directly (`from config import OLLAMA_URL`):
+# reads become a plain module-global lookup with no attribute dispatch.
+globals().update({name: getattr(config, name) for name in Config.model_fields})
+
+_initialized = False
+
+# Env-var sentinel recording which process ran init(). Pre-fork servers
+# (uvicorn/gunicorn with WORKERS > 1) re-import this module in every
+# worker; children of an already-initialized parent skip the mkdir and
+# validation work.
+_PARENT_SENTINEL = "_AI_ASSISTANT_CONFIG_PARENT_PID"
+
+
+def parse_only() -> Config:
+    """Validate configuration without any side effects.
+
+    Runs the full Pydantic parse, bypassing the disk cache and touching
+    neither the filesystem nor logging — suitable for CI config checks
+    (`python config.py`).
+    """
+    return Config()
+
+
+def activate() -> None:
+    """Run deferred startup side effects.
+
+    Directory creation and warning emission used to happen at import
+    time, costing mkdir syscalls and a logging import on every
+    `import config`. The application entrypoint calls this once during
+    startup instead; repeated calls are no-ops, and forked workers skip
+    the work their parent already did.
+    """
+    global _initialized
+    if _initialized:
+        return
+    _initialized = True
+
+    if os.environ.get(_PARENT_SENTINEL) == str(os.getppid()):
+        return
+    os.environ[_PARENT_SENTINEL] = str(os.getpid())
+
+    # Create necessary directories
+    config.create_directories()
+
+    # Validate configuration and log warnings
+    warnings = config.validate_configuration()
+    if warnings:
+        import logging
+        logger = logging.getLogger(__name__)
+        for warning in warnings:
+            logger.warning(f"Configuration warning: {warning}")
+
+
+if __name__ == "__main__":
+    # Fast config check: validate without creating directories or
+    # emitting warnings through logging.
+    parse_only()
+    print("Configuration OK")
@@ -0,0 +1,265 @@
+import asyncio
+import os
+import random
+import re
+import time
+from fastapi import Request, Response, HTTPException
+from fastapi.responses import ORJSONResponse
+from utils.rate_limiter import check_rate_limit, get_client_ip, record_request_result
+from utils.logging_config import log_request, log_error, request_id_var
+from config import config, MAX_REQUEST_SIZE, RATE_LIMIT_REQUESTS_PER_MINUTE
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Paths exempt from rate limiting, and per-path endpoint typing for the
+# rate limiter — both constant-time lookups
+_RATE_LIMIT_EXEMPT = frozenset(['/health', '/metrics'])
+_ENDPOINT_TYPES = {'/chat': 'ollama'}
+
+# Monitor-polled paths are only logged for a 10% sample so they don't
+# dominate log volume
+_NOISY_PATHS = frozenset(['/health', '/metrics'])
+_SAMPLE_RATE = 0.1
+
+# Headers identical for every response, encoded once at import time so
+# stamping them is a single list-extend per response. Only
+# Access-Control-Allow-Origin, X-RateLimit-* and X-Request-ID vary.
+_FIXED_HEADERS = [
+    (name.encode('latin-1'), value.encode('latin-1'))
+    for name, value in {
+        'X-Content-Type-Options': 'nosniff',
+        'X-Frame-Options': 'DENY',
+        # X-XSS-Protection is deliberately absent: deprecated and
+        # ignored by all modern browsers
+        'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+        'Content-Security-Policy': "default-src 'self'; script-src 'self' 'unsafe-inline'; style-src 'self' 'unsafe-inline'; img-src 'self' data:;",
+        'Referrer-Policy': 'strict-origin-when-cross-origin',
+        'Permissions-Policy': 'geolocation=(), microphone=(), camera=()',
+        'Access-Control-Allow-Methods': ', '.join(config.CORS_METHODS),
+        'Access-Control-Allow-Headers': ', '.join(config.CORS_HEADERS),
+        'Access-Control-Allow-Credentials': 'true',
+        'Access-Control-Max-Age': '86400',  # 24 hours
+    }.items()
+]
+
+# Error responses carry no renderable content; they get only this
+# minimal pair, which keeps the hottest responses under attack cheap
+_MIN_ERROR_HEADERS = [
+    (b'x-content-type-options', b'nosniff'),
+    (b'x-frame-options', b'DENY'),
+]
+
+_STATIC_CACHE_CONTROL = (b'cache-control', b'public, max-age=31536000, immutable')
+_LIMIT_HEADER = (b'x-ratelimit-limit', str(RATE_LIMIT_REQUESTS_PER_MINUTE).encode('latin-1'))
+
+# Tracing IDs don't need cryptographic randomness; a per-worker PRNG
+# seeded once from the OS avoids the os.urandom syscall and UUID object
+# allocation that uuid4() pays on every request
+_RID_RNG = random.Random()
+_RID_RNG.seed(os.urandom(32))
+
+def fast_request_id() -> str:
+    """Generate a 128-bit hex request ID without touching os.urandom"""
+    return f"{_RID_RNG.getrandbits(64):016x}{_RID_RNG.getrandbits(64):016x}"
+
+# The request-ID ContextVar lives in utils.logging_config (imported
+# above) so the logging filter can read it without a circular import.
+# Servers run each request in its own task, so the value never leaks
+# across requests and needs no reset.
+
+# Attack patterns compiled into one alternation so URL validation is a
+# single C-level scan instead of one substring search per pattern
+_ATTACK_PATTERNS = re.compile('|'.join(map(re.escape, (
+    '../', '..\\', '/etc/', '/proc/', '/sys/',
+    'script>', '<iframe', 'javascript:', 'vbscript:'
+))))
+
+_SUSPICIOUS_HEADERS = frozenset(['x-forwarded-host', 'x-forwarded-server'])
+
+# Rate-limiter bookkeeping runs after the response is sent; keep strong
+# references to the fire-and-forget tasks until they finish
+_PENDING_TASKS: set = set()
+
+def _record_result_later(success: bool, endpoint_type: str):
+    """Record a request result without making the client wait for it"""
+    task = asyncio.create_task(record_request_result(success, endpoint_type))
+    _PENDING_TASKS.add(task)
+    task.add_done_callback(_PENDING_TASKS.discard)
+
+class UnifiedMiddleware:
+    """Single pure-ASGI middleware: security, rate limiting, logging, CORS
+
+    BaseHTTPMiddleware buffers the body through anyio streams and spawns
+    an inner task per request, which defeats streaming responses and
+    doubles scheduling overhead. This class implements the ASGI3
+    protocol directly: validation and the rate-limit short circuit run
+    before the app, and response headers are injected by wrapping send
+    at the http.response.start message — no inner task, no stream.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request = Request(scope)
+        request_id = fast_request_id()
+        request.state.request_id = request_id
+        request_id_var.set(request_id)
+
+        start_time = time.perf_counter()
+        request.state.t0 = start_time  # single clock read shared by inner layers
+        path = scope["path"]
+        method = scope["method"]
+        client_ip = get_client_ip(request)
+        request.state.client_ip = client_ip
+
+        # Per-request response headers, filled in before the app runs
+        extra_headers = [(b'x-request-id', request_id.encode('latin-1'))]
+
+        origin = request.headers.get('origin')
+        if origin and ('*' in config.cors_origins_set
+                       or origin in config.cors_origins_set):
+            extra_headers.append((b'access-control-allow-origin', origin.encode('latin-1')))
+
+        # CORS preflight never reaches the app
+        if method == 'OPTIONS':
+            response = Response(status_code=204)
+            response.raw_headers.extend(_FIXED_HEADERS + extra_headers)
+            return await response(scope, receive, send)
+
+        # Internal endpoints (probes, static assets) carry no user
+        # attack surface; skip validation and rate limiting for them
+        internal = path in _RATE_LIMIT_EXEMPT or path.startswith('/static')
+
+        # Validate request
+        try:
+            if not internal:
+                self._validate_request(request, path)
+        except HTTPException as e:
+            log_request(
+                method=method,
+                path=path,
+                status_code=e.status_code,
+                duration=time.perf_counter() - start_time,
+                request_id=request_id,
+                error=str(e.detail)
+            )
+            response = ORJSONResponse(status_code=e.status_code, content={"error": e.detail})
+            response.raw_headers.extend(_MIN_ERROR_HEADERS)
+            return await response(scope, receive, send)
+
+        # Rate limit (health checks and static files are exempt)
+        rate_limit_info = None
+        endpoint_type = 'general'
+        if not internal:
+            endpoint_type = _ENDPOINT_TYPES.get(path, 'general')
+            rate_limit_info = await check_rate_limit(client_ip, endpoint_type)
+
+            if not rate_limit_info.allowed:
+                logger.warning("Rate limit exceeded for IP: %s", client_ip)
+                headers = {
+                    'X-RateLimit-Limit': str(RATE_LIMIT_REQUESTS_PER_MINUTE),
+                    'X-RateLimit-Remaining': str(rate_limit_info.remaining),
+                    'X-RateLimit-Reset': str(int(rate_limit_info.reset_time)),
+                }
+                if rate_limit_info.retry_after:
+                    headers['Retry-After'] = str(int(rate_limit_info.retry_after))
+
+                response = ORJSONResponse(
+                    status_code=429,
+                    content={
+                        "error": "Rate limit exceeded",
+                        "retry_after": rate_limit_info.retry_after
+                    },
+                    headers=headers
+                )
+                response.raw_headers.extend(_MIN_ERROR_HEADERS)
+                return await response(scope, receive, send)
+
+            extra_headers.extend([
+                _LIMIT_HEADER,
+                (b'x-ratelimit-remaining', str(rate_limit_info.remaining).encode('latin-1')),
+                (b'x-ratelimit-reset', str(int(rate_limit_info.reset_time)).encode('latin-1')),
+            ])
+
+        response_started = False
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal response_started, status_code
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                headers = message.setdefault("headers", [])
+                headers.extend(_FIXED_HEADERS if status_code < 400 else _MIN_ERROR_HEADERS)
+                headers.extend(extra_headers)
+                if path.startswith('/static') and not any(k == b'cache-control' for k, _ in headers):
+                    headers.append(_STATIC_CACHE_CONTROL)
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Log once the full response has been sent; noisy paths
+                # are sampled to keep formatter and I/O cost down
+                noisy = path in _NOISY_PATHS or path.startswith('/static')
+                if not noisy or random.random() < _SAMPLE_RATE:
+                    log_request(
+                        method=method,
+                        path=path,
+                        status_code=status_code,
+                        duration=time.perf_counter() - start_time,
+                        request_id=request_id,
+                        user_agent=request.headers.get('user-agent', 'unknown'),
+                        ip=client_ip
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            if rate_limit_info is not None:
+                _record_result_later(False, endpoint_type)
+
+            duration = time.perf_counter() - start_time
+            log_error(e, {
+                'request_id': request_id,
+                'method': method,
+                'path': path,
+                'duration': duration
+            })
+
+            if response_started:
+                raise
+
+            response = ORJSONResponse(
+                status_code=500,
+                content={"error": "Internal server error", "request_id": request_id}
+            )
+            response.raw_headers.extend(_MIN_ERROR_HEADERS)
+            return await response(scope, receive, send)
+
+        if rate_limit_info is not None:
+            _record_result_later(True, endpoint_type)
+
+    def _validate_request(self, request: Request, path: str):
+        """Validate incoming request"""
+        # Check content length
+        content_length = request.headers.get('content-length')
+        if content_length and int(content_length) > MAX_REQUEST_SIZE:
+            raise HTTPException(status_code=413, detail="Request too large")
+
+        # Check for suspicious headers
+        for header in _SUSPICIOUS_HEADERS.intersection(request.headers.keys()):
+            logger.warning("Suspicious header detected: %s", header)
+
+        # Validate User-Agent
+        user_agent = request.headers.get('user-agent', '')
+        if len(user_agent) > 500:
+            raise HTTPException(status_code=400, detail="Invalid User-Agent")
+
+        # Check for common attack patterns in URL (single compiled scan)
+        match = _ATTACK_PATTERNS.search(path.lower())
+        if match:
+            logger.warning("Potential attack pattern detected: %s", match.group())
+            raise HTTPException(status_code=400, detail="Invalid request")
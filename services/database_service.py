@@ -1,3 +1,4 @@
+import asyncio
 import sqlite3
 import aiosqlite
 import logging
@@ -11,12 +12,59 @@ from utils.logging_config import log_performance
 
 logger = logging.getLogger(__name__)
 
+# Long-lived connections kept in the pool; each retains a warm SQLite
+# page cache, so pool size trades memory for fewer cold B+tree reads
+_POOL_SIZE = 8
+
+# Timestamps are stored at second resolution, so the formatted string
+# only changes once a second — memoize it instead of paying datetime
+# construction and strftime on every write
+_ts_cache = (0, "")
+
+def _now_str() -> str:
+    """Current local time as the stored 'YYYY-MM-DD HH:MM:SS' string"""
+    global _ts_cache
+    t = int(time.time())
+    if t != _ts_cache[0]:
+        _ts_cache = (t, format_local_datetime(now_local(), "%Y-%m-%d %H:%M:%S"))
+    return _ts_cache[1]
+
+# Passive WAL checkpoint cadence for the writer loop, in commits;
+# keeps checkpoints off foreign coroutines' commit paths
+_CHECKPOINT_EVERY = 1000
+
+# How often the background task refreshes planner statistics with
+# PRAGMA optimize, in seconds
+_OPTIMIZE_INTERVAL = 900
+
 class DatabaseService:
     """Async database service for chat messages"""
 
     def __init__(self, db_path: str = None):
-        self.db_path = db_path or config.DATABASE_URL.replace("sqlite:///", "")
+        self.db_path = db_path or str(config.database_file_path)
         self._initialized = False
+        self._pool: Optional[asyncio.Queue] = None
+        self._write_conn = None
+        self._write_q: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._optimize_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def _configure(db):
+        """Apply per-connection row factory and tuned pragmas
+
+        WAL removes the rollback-journal double fsync on every commit
+        and lets readers run concurrently with a writer; NORMAL sync is
+        safe under WAL (the log is fsynced on checkpoint). The rest keep
+        temp structures and hot pages in memory.
+        """
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute("PRAGMA synchronous=NORMAL")
+        await db.execute("PRAGMA temp_store=MEMORY")
+        await db.execute("PRAGMA cache_size=-64000")
+        await db.execute("PRAGMA mmap_size=268435456")
+        await db.execute("PRAGMA busy_timeout=5000")
 
     async def initialize(self):
         """Initialize database with required tables"""
@@ -25,6 +73,10 @@ class DatabaseService:
 
         try:
             async with aiosqlite.connect(self.db_path) as db:
+                # journal_mode=WAL is sticky on the database file, so
+                # setting it here persists for all later connections
+                await self._configure(db)
+
                 # Create chat_sessions table
                 await db.execute("""
                     CREATE TABLE IF NOT EXISTS chat_sessions (
@@ -48,14 +100,20 @@ class DatabaseService:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         response_time REAL,
                         token_count INTEGER,
+                        rendered_html TEXT,
                         FOREIGN KEY (session_id) REFERENCES chat_sessions(id) ON DELETE CASCADE
                     )
                 """)
 
-                # Create indexes for better performance
+                # Create indexes for better performance. The compound
+                # (session_id, created_at DESC) index satisfies the
+                # history/context queries' ORDER BY straight from the
+                # index, skipping the temp b-tree sort; it also subsumes
+                # the old single-column session_id index.
                 await db.execute(
-                    "CREATE INDEX IF NOT EXISTS idx_messages_session_id ON messages(session_id)"
+                    "CREATE INDEX IF NOT EXISTS idx_messages_session_time ON messages(session_id, created_at DESC)"
                 )
+                await db.execute("DROP INDEX IF EXISTS idx_messages_session_id")
                 await db.execute(
                     "CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at)"
                 )
@@ -65,27 +123,201 @@ class DatabaseService:
                 await db.execute(
                     "CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON chat_sessions(updated_at)"
                 )
+                await db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_messages_session_role_time ON messages(session_id, role, created_at DESC)"
+                )
+
+                # Session bookkeeping rides along inside the insert's
+                # transaction instead of a separate app-level UPDATE
+                await db.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_bump_session
+                    AFTER INSERT ON messages
+                    BEGIN
+                        UPDATE chat_sessions
+                        SET message_count = message_count + 1,
+                            updated_at = NEW.created_at
+                        WHERE id = NEW.session_id;
+                    END
+                """)
+
+                # Running aggregates for get_statistics, maintained by
+                # triggers so the stats endpoint never scans the messages
+                # table. Seeded once from existing rows; INSERT OR IGNORE
+                # keeps re-initialization from clobbering live counters.
+                await db.execute(
+                    "CREATE TABLE IF NOT EXISTS stats (k TEXT PRIMARY KEY, v REAL NOT NULL)"
+                )
+                await db.execute(
+                    "INSERT OR IGNORE INTO stats (k, v) SELECT 'total_messages', COUNT(*) FROM messages"
+                )
+                await db.execute(
+                    "INSERT OR IGNORE INTO stats (k, v) SELECT 'sum_response_time', COALESCE(SUM(response_time), 0) FROM messages"
+                )
+                await db.execute(
+                    "INSERT OR IGNORE INTO stats (k, v) SELECT 'count_with_response_time', COUNT(response_time) FROM messages"
+                )
+                await db.execute(
+                    "INSERT OR IGNORE INTO stats (k, v) SELECT 'role_' || role, COUNT(*) FROM messages GROUP BY role"
+                )
+                await db.execute(
+                    "INSERT OR IGNORE INTO stats (k, v) VALUES ('role_user', 0), ('role_assistant', 0)"
+                )
+                await db.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_stats_insert
+                    AFTER INSERT ON messages
+                    BEGIN
+                        UPDATE stats SET v = v + 1
+                        WHERE k IN ('total_messages', 'role_' || NEW.role);
+                    END
+                """)
+                await db.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_stats_insert_rt
+                    AFTER INSERT ON messages
+                    WHEN NEW.response_time IS NOT NULL
+                    BEGIN
+                        UPDATE stats SET v = v + NEW.response_time WHERE k = 'sum_response_time';
+                        UPDATE stats SET v = v + 1 WHERE k = 'count_with_response_time';
+                    END
+                """)
+                await db.execute("""
+                    CREATE TRIGGER IF NOT EXISTS trg_stats_delete
+                    AFTER DELETE ON messages
+                    BEGIN
+                        UPDATE stats SET v = v - 1
+                        WHERE k IN ('total_messages', 'role_' || OLD.role);
+                        UPDATE stats SET v = v - COALESCE(OLD.response_time, 0) WHERE k = 'sum_response_time';
+                        UPDATE stats SET v = v - (OLD.response_time IS NOT NULL) WHERE k = 'count_with_response_time';
+                    END
+                """)
+
+                # Add rendered_html column to databases created before it existed
+                await self._ensure_rendered_html_column(db)
 
                 # Migrate existing messages to default session if needed
                 await self._migrate_existing_messages(db)
 
+                # Fresh planner statistics so the composite indexes are
+                # actually chosen once the table has grown
+                await db.execute("ANALYZE")
+
                 await db.commit()
                 logger.info(f"Database initialized at {self.db_path}")
-                self._initialized = True
+
+            # Build the pool of long-lived read connections; WAL lets
+            # them run concurrently with the single writer
+            pool = asyncio.Queue(maxsize=_POOL_SIZE)
+            for _ in range(_POOL_SIZE):
+                conn = await aiosqlite.connect(self.db_path)
+                await self._configure(conn)
+                pool.put_nowait(conn)
+            self._pool = pool
+
+            # All writes funnel through one dedicated connection so
+            # they serialize without SQLITE_BUSY retries and WAL
+            # checkpoints never stall a foreign coroutine's commit
+            self._write_conn = await aiosqlite.connect(self.db_path)
+            await self._configure(self._write_conn)
+            self._write_q = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._writer_loop())
+            self._optimize_task = asyncio.create_task(self._optimize_loop())
+
+            self._initialized = True
 
         except Exception as e:
             logger.error(f"Failed to initialize database: {str(e)}")
             raise
 
+    async def _writer_loop(self):
+        """Run queued write operations on the dedicated writer connection"""
+        commits = 0
+        while True:
+            op, fut = await self._write_q.get()
+            try:
+                result = await op(self._write_conn)
+                if not fut.cancelled():
+                    fut.set_result(result)
+            except Exception as e:
+                if self._write_conn.in_transaction:
+                    try:
+                        await self._write_conn.rollback()
+                    except Exception as rollback_error:
+                        logger.warning(f"Writer rollback failed: {str(rollback_error)}")
+                if not fut.cancelled():
+                    fut.set_exception(e)
+            finally:
+                self._write_q.task_done()
+
+            commits += 1
+            if commits % _CHECKPOINT_EVERY == 0:
+                try:
+                    await self._write_conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+                except Exception as e:
+                    logger.warning(f"Passive checkpoint failed: {str(e)}")
+
+    async def _optimize_loop(self):
+        """Periodically refresh query-planner statistics
+
+        PRAGMA optimize re-analyzes only the tables whose row counts
+        have shifted since the last run, which keeps the planner from
+        silently falling back to full scans as messages accumulates.
+        Runs through the writer queue so it never races a transaction.
+        """
+        while True:
+            await asyncio.sleep(_OPTIMIZE_INTERVAL)
+            try:
+                async def op(db):
+                    await db.execute("PRAGMA optimize")
+                await self._submit_write(op)
+            except Exception as e:
+                logger.warning(f"PRAGMA optimize failed: {str(e)}")
+
+    async def _submit_write(self, op):
+        """Run a write operation on the writer connection and await it
+
+        op is a coroutine function taking the writer connection; its
+        return value is relayed back to the caller.
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        fut = asyncio.get_running_loop().create_future()
+        await self._write_q.put((op, fut))
+        return await fut
+
     @asynccontextmanager
     async def get_connection(self):
-        """Get async database connection"""
+        """Get a pooled async database connection
+
+        Connections are opened once at initialize() and reused, which
+        skips the per-call open/close syscalls, pragma setup and cold
+        page cache of a fresh aiosqlite.connect.
+        """
         if not self._initialized:
             await self.initialize()
 
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        db = await self._pool.get()
+        try:
             yield db
+        finally:
+            # Never return a connection mid-transaction: a failed
+            # caller would otherwise poison the next borrower
+            if db.in_transaction:
+                try:
+                    await db.rollback()
+                except Exception as e:
+                    logger.warning(f"Rollback on pool return failed: {str(e)}")
+            self._pool.put_nowait(db)
+
+    async def _ensure_rendered_html_column(self, db):
+        """Add the rendered_html column to existing databases"""
+        try:
+            cursor = await db.execute("PRAGMA table_info(messages)")
+            columns = [row[1] for row in await cursor.fetchall()]
+            if 'rendered_html' not in columns:
+                await db.execute("ALTER TABLE messages ADD COLUMN rendered_html TEXT")
+                logger.info("Added rendered_html column to messages table")
+        except Exception as e:
+            logger.warning(f"Migration warning: {str(e)}")
 
     async def _migrate_existing_messages(self, db):
         """Migrate existing messages to default session"""
@@ -96,7 +328,7 @@ class DatabaseService:
 
             if result and result['count'] > 0:
                 # Create default session with local timezone
-                local_now = format_local_datetime(now_local(), "%Y-%m-%d %H:%M:%S")
+                local_now = _now_str()
                 cursor = await db.execute(
                     "INSERT INTO chat_sessions (title, created_at, updated_at, message_count) VALUES (?, ?, ?, ?)",
                     ("Imported Chat", local_now, local_now, result['count'])
@@ -113,55 +345,175 @@ class DatabaseService:
             logger.warning(f"Migration warning: {str(e)}")
 
     async def save_message(self, role: str, content: str, session_id: int = None, model: str = None,
-                          response_time: float = None, token_count: int = None) -> int:
+                          response_time: float = None, token_count: int = None,
+                          rendered_html: str = None) -> int:
         """Save a message to the database"""
-        start_time = time.time()
-        
+        start_time = time.perf_counter()
+
+        # Estimate tokens once at write time (~1.3 per word) so the
+        # context read path never has to split content again
+        if token_count is None:
+            token_count = int(len(content.split()) * 1.3)
+
         try:
-            # If no session_id provided, create a new session
-            if session_id is None:
-                session_id = await self.create_session()
+            async def op(db):
+                # Use local timezone for created_at; the insert and the
+                # trg_bump_session trigger share one commit fsync
+                local_now = _now_str()
+
+                # No session yet: create one inside the same transaction
+                # as the message insert, so a brand-new chat's first
+                # message costs one commit fsync instead of two
+                sid = session_id
+                if sid is None:
+                    cursor = await db.execute(
+                        "INSERT INTO chat_sessions (title, created_at, updated_at, message_count) VALUES (?, ?, ?, 0)",
+                        ("New Chat", local_now, local_now)
+                    )
+                    sid = cursor.lastrowid
 
-            async with self.get_connection() as db:
-                # Use local timezone for created_at
-                local_now = format_local_datetime(now_local(), "%Y-%m-%d %H:%M:%S")
                 cursor = await db.execute(
                     """
-                    INSERT INTO messages (session_id, role, content, model, created_at, response_time, token_count)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    INSERT INTO messages (session_id, role, content, model, created_at, response_time, token_count, rendered_html)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                     """,
-                    (session_id, role, content, model, local_now, response_time, token_count)
+                    (sid, role, content, model, local_now, response_time, token_count, rendered_html)
                 )
-                await db.commit()
                 message_id = cursor.lastrowid
+                await db.commit()
+                return message_id, sid
+
+            message_id, session_id = await self._submit_write(op)
+
+            # Log performance if operation takes too long
+            duration = time.perf_counter() - start_time
+            if duration > config.PERFORMANCE_LOG_THRESHOLD:
+                log_performance(
+                    operation="db_save_message",
+                    duration=duration,
+                    session_id=session_id,
+                    role=role,
+                    content_length=len(content)
+                )
 
-                # Update session message count and updated_at with local timezone
-                await db.execute(
-                    "UPDATE chat_sessions SET message_count = message_count + 1, updated_at = ? WHERE id = ?",
-                    (local_now, session_id)
+            logger.debug(f"Saved message {message_id}: {role} in session {session_id}")
+            return message_id
+
+        except Exception as e:
+            logger.error(f"Failed to save message: {str(e)}")
+            raise
+
+    async def save_messages(self, rows: List[tuple]) -> List[int]:
+        """Save several messages in one transaction
+
+        Each row is (session_id, role, content, model, response_time,
+        token_count, rendered_html). The batch shares one pool
+        acquisition, one transaction and one commit fsync, against one
+        per message with repeated save_message calls. Returns the new
+        message ids in row order.
+        """
+        if not rows:
+            return []
+
+        start_time = time.perf_counter()
+
+        try:
+            async def op(db):
+                local_now = _now_str()
+                await db.executemany(
+                    """
+                    INSERT INTO messages (session_id, role, content, model, created_at, response_time, token_count, rendered_html)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (r[0], r[1], r[2], r[3], local_now, r[4],
+                         r[5] if r[5] is not None else int(len(r[2].split()) * 1.3),
+                         r[6])
+                        for r in rows
+                    ]
                 )
+                cursor = await db.execute("SELECT last_insert_rowid()")
+                last_id = (await cursor.fetchone())[0]
                 await db.commit()
+                return last_id
 
-                # Log performance if operation takes too long
-                duration = time.time() - start_time
-                if duration > config.PERFORMANCE_LOG_THRESHOLD:
-                    log_performance(
-                        operation="db_save_message",
-                        duration=duration,
-                        session_id=session_id,
-                        role=role,
-                        content_length=len(content)
-                    )
+            last_id = await self._submit_write(op)
+
+            # Log performance if operation takes too long
+            duration = time.perf_counter() - start_time
+            if duration > config.PERFORMANCE_LOG_THRESHOLD:
+                log_performance(
+                    operation="db_save_messages",
+                    duration=duration,
+                    message_count=len(rows)
+                )
 
-                logger.debug(f"Saved message {message_id}: {role} in session {session_id}")
-                return message_id
+            # Rowids are sequential within the single write transaction
+            return list(range(last_id - len(rows) + 1, last_id + 1))
 
         except Exception as e:
-            logger.error(f"Failed to save message: {str(e)}")
+            logger.error(f"Failed to save message batch: {str(e)}")
             raise
 
-    async def get_recent_messages(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get recent messages from the database"""
+    async def save_user_message_and_get_count(self, session_id: int, content: str) -> int:
+        """Save a user message and return the session's pre-insert message count
+
+        Combines the get_session + save_message pair used by the chat
+        handlers into one connection acquire and one transaction, so the
+        caller can decide whether this was the first message (count == 0)
+        without an extra round-trip.
+        """
+        start_time = time.perf_counter()
+
+        try:
+            async def op(db):
+                # The writer serializes ops, so the count read and the
+                # insert see a consistent session row
+                cursor = await db.execute(
+                    "SELECT message_count FROM chat_sessions WHERE id = ?",
+                    (session_id,)
+                )
+                row = await cursor.fetchone()
+                previous_count = row['message_count'] if row else 0
+
+                local_now = _now_str()
+                await db.execute(
+                    """
+                    INSERT INTO messages (session_id, role, content, created_at, token_count)
+                    VALUES (?, 'user', ?, ?, ?)
+                    """,
+                    (session_id, content, local_now, int(len(content.split()) * 1.3))
+                )
+                # trg_bump_session updates the session row
+                await db.commit()
+                return previous_count
+
+            previous_count = await self._submit_write(op)
+
+            # Log performance if operation takes too long
+            duration = time.perf_counter() - start_time
+            if duration > config.PERFORMANCE_LOG_THRESHOLD:
+                log_performance(
+                    operation="db_save_user_message_and_get_count",
+                    duration=duration,
+                    session_id=session_id,
+                    content_length=len(content)
+                )
+
+            logger.debug(f"Saved user message in session {session_id} (previous count: {previous_count})")
+            return previous_count
+
+        except Exception as e:
+            logger.error(f"Failed to save user message: {str(e)}")
+            raise
+
+    async def get_recent_messages(self, limit: int = 10) -> List[aiosqlite.Row]:
+        """Get recent messages from the database
+
+        Rows support both index and key access, so callers read them
+        like dicts without the per-row dict/key allocation; convert
+        with dict(row) only at a JSON boundary.
+        """
         try:
             async with self.get_connection() as db:
                 cursor = await db.execute(
@@ -173,8 +525,7 @@ class DatabaseService:
                     """,
                     (limit,)
                 )
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+                return await cursor.fetchall()
 
         except Exception as e:
             logger.error(f"Failed to get recent messages: {str(e)}")
@@ -182,35 +533,41 @@ class DatabaseService:
 
     async def create_session(self, title: str = "New Chat") -> int:
         """Create a new chat session"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
-            async with self.get_connection() as db:
-                local_now = format_local_datetime(now_local(), "%Y-%m-%d %H:%M:%S")
+            async def op(db):
+                local_now = _now_str()
                 cursor = await db.execute(
                     "INSERT INTO chat_sessions (title, created_at, updated_at, message_count) VALUES (?, ?, ?, 0)",
                     (title, local_now, local_now)
                 )
                 await db.commit()
-                session_id = cursor.lastrowid
-                
-                # Log performance if operation takes too long
-                duration = time.time() - start_time
-                if duration > config.PERFORMANCE_LOG_THRESHOLD:
-                    log_performance(
-                        operation="db_create_session",
-                        duration=duration,
-                        title=title
-                    )
-                
-                logger.debug(f"Created new session {session_id}: {title} with message_count=0")
-                return session_id
+                return cursor.lastrowid
+
+            session_id = await self._submit_write(op)
+
+            # Log performance if operation takes too long
+            duration = time.perf_counter() - start_time
+            if duration > config.PERFORMANCE_LOG_THRESHOLD:
+                log_performance(
+                    operation="db_create_session",
+                    duration=duration,
+                    title=title
+                )
+
+            logger.debug(f"Created new session {session_id}: {title} with message_count=0")
+            return session_id
         except Exception as e:
             logger.error(f"Failed to create session: {str(e)}")
             raise
 
-    async def get_sessions(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get all chat sessions ordered by most recent"""
+    async def get_sessions(self, limit: int = 50) -> List[aiosqlite.Row]:
+        """Get all chat sessions ordered by most recent
+
+        Returns rows, not dicts; templates and internal callers access
+        fields by key either way, so the per-row dict copy is skipped.
+        """
         try:
             async with self.get_connection() as db:
                 cursor = await db.execute(
@@ -223,8 +580,7 @@ class DatabaseService:
                     """,
                     (limit,)
                 )
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+                return await cursor.fetchall()
         except Exception as e:
             logger.error(f"Failed to get sessions: {str(e)}")
             return []
@@ -243,26 +599,47 @@ class DatabaseService:
             logger.error(f"Failed to get session {session_id}: {str(e)}")
             return None
 
+    async def get_session_version(self, session_id: int) -> tuple:
+        """Get a cheap change marker for a session's messages
+
+        Returns (message_count, last_message_id); either value changes
+        whenever a message lands, so together they version the rendered
+        page for ETag comparisons.
+        """
+        try:
+            async with self.get_connection() as db:
+                cursor = await db.execute(
+                    "SELECT COUNT(*), MAX(id) FROM messages WHERE session_id = ?",
+                    (session_id,)
+                )
+                row = await cursor.fetchone()
+                return (row[0] or 0, row[1] or 0)
+        except Exception as e:
+            logger.error(f"Failed to get session version: {str(e)}")
+            return (0, 0)
+
     async def update_session_title(self, session_id: int, title: str) -> bool:
         """Update session title"""
         logger.debug(f"DEBUG: update_session_title called for session {session_id} with title: '{title}'")
         try:
-            async with self.get_connection() as db:
-                local_now = format_local_datetime(now_local(), "%Y-%m-%d %H:%M:%S")
+            async def op(db):
+                local_now = _now_str()
                 cursor = await db.execute(
                     "UPDATE chat_sessions SET title = ?, updated_at = ? WHERE id = ?",
                     (title, local_now, session_id)
                 )
                 await db.commit()
-                rows_affected = cursor.rowcount
-                logger.debug(f"DEBUG: Title update for session {session_id} affected {rows_affected} rows")
+                return cursor.rowcount
 
-                if rows_affected > 0:
-                    logger.info(f"DEBUG: Successfully updated title for session {session_id} to: '{title}'")
-                    return True
-                else:
-                    logger.warning(f"DEBUG: No rows affected when updating title for session {session_id}")
-                    return False
+            rows_affected = await self._submit_write(op)
+            logger.debug(f"DEBUG: Title update for session {session_id} affected {rows_affected} rows")
+
+            if rows_affected > 0:
+                logger.info(f"DEBUG: Successfully updated title for session {session_id} to: '{title}'")
+                return True
+            else:
+                logger.warning(f"DEBUG: No rows affected when updating title for session {session_id}")
+                return False
         except Exception as e:
             logger.error(f"Failed to update session title: {str(e)}")
             return False
@@ -270,27 +647,29 @@ class DatabaseService:
     async def delete_session(self, session_id: int) -> bool:
         """Delete a session and all its messages"""
         try:
-            async with self.get_connection() as db:
+            async def op(db):
                 await db.execute("UPDATE chat_sessions SET is_active = 0 WHERE id = ?", (session_id,))
                 await db.commit()
                 return True
+
+            return await self._submit_write(op)
         except Exception as e:
             logger.error(f"Failed to delete session: {str(e)}")
             return False
 
-    async def get_conversation_history(self, session_id: int = None, limit: int = 50) -> List[Dict[str, Any]]:
+    async def get_conversation_history(self, session_id: int = None, limit: int = 50) -> List[aiosqlite.Row]:
         """Get conversation history from the database for a specific session"""
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         try:
             async with self.get_connection() as db:
                 if session_id:
                     cursor = await db.execute(
                         """
-                        SELECT role, content, model, created_at, response_time, token_count
+                        SELECT role, content, model, created_at, response_time, token_count, rendered_html
                         FROM messages
                         WHERE session_id = ?
-                        ORDER BY created_at DESC
+                        ORDER BY created_at DESC, id DESC
                         LIMIT ?
                         """,
                         (session_id, limit)
@@ -306,10 +685,10 @@ class DatabaseService:
 
                     cursor = await db.execute(
                         """
-                        SELECT role, content, model, created_at, response_time, token_count
+                        SELECT role, content, model, created_at, response_time, token_count, rendered_html
                         FROM messages
                         WHERE session_id = ?
-                        ORDER BY created_at DESC
+                        ORDER BY created_at DESC, id DESC
                         LIMIT ?
                         """,
                         (session_result['id'], limit)
@@ -318,7 +697,7 @@ class DatabaseService:
                 messages = await cursor.fetchall()
                 
                 # Log performance if operation takes too long
-                duration = time.time() - start_time
+                duration = time.perf_counter() - start_time
                 if duration > config.PERFORMANCE_LOG_THRESHOLD:
                     log_performance(
                         operation="db_get_conversation_history",
@@ -328,15 +707,11 @@ class DatabaseService:
                         limit=limit
                     )
                 
-                # Convert timestamps to local timezone and reverse to get chronological order
-                result = []
-                for row in reversed(messages):
-                    message_dict = dict(row)
-                    if message_dict.get('created_at'):
-                        # The timestamp is already in local timezone, just format it for display
-                        message_dict['created_at'] = message_dict['created_at']
-                    result.append(message_dict)
-                return result
+                # Timestamps are already stored in local time; just
+                # reverse to chronological order. Rows go out as-is —
+                # callers key into them like dicts without each row
+                # being copied into one.
+                return list(reversed(messages))
 
         except Exception as e:
             logger.error(f"Failed to get conversation history: {str(e)}")
@@ -346,34 +721,31 @@ class DatabaseService:
         """Get recent messages that fit within token limit for context"""
         try:
             async with self.get_connection() as db:
+                # Token counts are persisted at write time, so SQL can
+                # walk newest-first with a running SUM and return only
+                # the rows that fit the budget — no Python splitting.
+                # COALESCE covers rows written before counts existed.
                 cursor = await db.execute(
                     """
-                    SELECT role, content, created_at
-                    FROM messages
-                    WHERE session_id = ?
-                    ORDER BY created_at DESC
-                    LIMIT 20
+                    SELECT role, content FROM (
+                        SELECT id, role, content, created_at,
+                               SUM(COALESCE(token_count, (length(content) + 3) / 4))
+                                   OVER (ORDER BY created_at DESC, id DESC) AS running
+                        FROM messages
+                        WHERE session_id = ?
+                        ORDER BY created_at DESC, id DESC
+                        LIMIT 20
+                    )
+                    WHERE running < ?
+                    ORDER BY created_at ASC, id ASC
                     """,
-                    (session_id,)
+                    (session_id, max_tokens)
                 )
 
-                messages = await cursor.fetchall()
-                context = []
-                token_count = 0
-
-                # Process messages in reverse order (oldest first for context)
-                for row in reversed(messages):
-                    role, content, timestamp = row['role'], row['content'], row['created_at']
-                    # Rough token estimation: ~1.3 tokens per word
-                    estimated_tokens = len(content.split()) * 1.3
-
-                    if token_count + estimated_tokens < max_tokens:
-                        context.append({"role": role, "content": content})
-                        token_count += estimated_tokens
-                    else:
-                        break
-
-                logger.debug(f"Retrieved {len(context)} messages for context (estimated {token_count:.0f} tokens)")
+                context = [{"role": row['role'], "content": row['content']}
+                           for row in await cursor.fetchall()]
+
+                logger.debug(f"Retrieved {len(context)} messages for context")
                 return context
 
         except Exception as e:
@@ -384,27 +756,23 @@ class DatabaseService:
         """Get database statistics"""
         try:
             async with self.get_connection() as db:
-                # Total messages
-                cursor = await db.execute("SELECT COUNT(*) as total FROM messages")
-                total_row = await cursor.fetchone()
-                total_messages = total_row['total'] if total_row else 0
-
-                # Messages by role
-                cursor = await db.execute(
-                    "SELECT role, COUNT(*) as count FROM messages GROUP BY role"
+                # The trigger-maintained stats table makes this a
+                # handful of primary-key lookups instead of scanning
+                # and aggregating the whole messages table
+                cursor = await db.execute("SELECT k, v FROM stats")
+                stats = {row['k']: row['v'] for row in await cursor.fetchall()}
+
+                count_rt = stats.get('count_with_response_time', 0)
+                avg_response_time = (
+                    stats.get('sum_response_time', 0) / count_rt if count_rt else None
                 )
-                role_counts = {row['role']: row['count'] for row in await cursor.fetchall()}
-
-                # Average response time
-                cursor = await db.execute(
-                    "SELECT AVG(response_time) as avg_time FROM messages WHERE response_time IS NOT NULL"
-                )
-                avg_time_row = await cursor.fetchone()
-                avg_response_time = avg_time_row['avg_time'] if avg_time_row else 0
 
                 return {
-                    'total_messages': total_messages,
-                    'role_counts': role_counts,
+                    'total_messages': int(stats.get('total_messages', 0)),
+                    'role_counts': {
+                        role: int(stats.get(f'role_{role}', 0))
+                        for role in ('user', 'assistant')
+                    },
                     'average_response_time': avg_response_time
                 }
 
@@ -412,20 +780,37 @@ class DatabaseService:
             logger.error(f"Failed to get statistics: {str(e)}")
             return {}
 
-    async def cleanup_old_messages(self, days: int = 30) -> int:
-        """Clean up messages older than specified days"""
+    async def cleanup_old_messages(self, days: int = 30, batch_size: int = 5000) -> int:
+        """Clean up messages older than specified days
+
+        Deletes in committed batches so one huge transaction doesn't
+        hold the write lock against live traffic; WAL checkpoints can
+        run between batches. The cutoff is a bound parameter, so the
+        statement plan is reused across calls.
+        """
         try:
-            async with self.get_connection() as db:
-                cursor = await db.execute(
-                    """
-                    DELETE FROM messages
-                    WHERE created_at < datetime('now', '-{} days')
-                    """.format(days)
-                )
-                await db.commit()
-                deleted_count = cursor.rowcount
-                logger.info(f"Cleaned up {deleted_count} old messages")
-                return deleted_count
+            async def op(db):
+                deleted = 0
+                while True:
+                    cursor = await db.execute(
+                        """
+                        DELETE FROM messages
+                        WHERE id IN (
+                            SELECT id FROM messages
+                            WHERE created_at < datetime('now', ?)
+                            LIMIT ?
+                        )
+                        """,
+                        (f'-{days} days', batch_size)
+                    )
+                    await db.commit()
+                    deleted += cursor.rowcount
+                    if cursor.rowcount < batch_size:
+                        return deleted
+
+            deleted_count = await self._submit_write(op)
+            logger.info(f"Cleaned up {deleted_count} old messages")
+            return deleted_count
 
         except Exception as e:
             logger.error(f"Failed to cleanup old messages: {str(e)}")
@@ -443,34 +828,70 @@ class DatabaseService:
 
     async def close(self):
         """Close the database service and cleanup resources"""
-        # Since we're using aiosqlite with context managers,
-        # there's no persistent connection to close
-        # This method exists for consistency with the service interface
         self._initialized = False
+        if self._optimize_task is not None:
+            self._optimize_task.cancel()
+            try:
+                await self._optimize_task
+            except asyncio.CancelledError:
+                pass
+            self._optimize_task = None
+        if self._writer_task is not None:
+            # Let queued writes land before stopping the writer
+            if self._write_q is not None:
+                await self._write_q.join()
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+            self._write_q = None
+        if self._write_conn is not None:
+            try:
+                await self._write_conn.close()
+            except Exception as e:
+                logger.warning(f"Error closing writer connection: {str(e)}")
+            self._write_conn = None
+        if self._pool is not None:
+            while not self._pool.empty():
+                conn = self._pool.get_nowait()
+                try:
+                    await conn.close()
+                except Exception as e:
+                    logger.warning(f"Error closing pooled connection: {str(e)}")
+            self._pool = None
         logger.info("Database service closed")
 
     async def update_last_assistant_message(self, session_id: int, new_content: str):
         """Update the last assistant message in a session"""
         try:
-            async with self.get_connection() as db:
+            async def op(db):
+                # One indexed seek on (session_id, role, created_at)
+                # then an update by primary key — no sort step
                 cursor = await db.execute(
                     """
-                    UPDATE messages
-                    SET content = ?, created_at = datetime('now')
+                    SELECT id FROM messages
                     WHERE session_id = ? AND role = 'assistant'
-                    AND id = (
-                        SELECT id FROM messages 
-                        WHERE session_id = ? AND role = 'assistant' 
-                        ORDER BY created_at DESC 
-                        LIMIT 1
-                    )
+                    ORDER BY created_at DESC
+                    LIMIT 1
                     """,
-                    (new_content, session_id, session_id)
+                    (session_id,)
+                )
+                row = await cursor.fetchone()
+                if row is None:
+                    return 0
+
+                cursor = await db.execute(
+                    "UPDATE messages SET content = ?, created_at = datetime('now') WHERE id = ?",
+                    (new_content, row['id'])
                 )
                 await db.commit()
-                rows_affected = cursor.rowcount
-                logger.debug(f"Updated last assistant message for session {session_id}, rows affected: {rows_affected}")
-                return rows_affected > 0
+                return cursor.rowcount
+
+            rows_affected = await self._submit_write(op)
+            logger.debug(f"Updated last assistant message for session {session_id}, rows affected: {rows_affected}")
+            return rows_affected > 0
         except Exception as e:
             logger.error(f"Error updating last assistant message: {e}")
             raise
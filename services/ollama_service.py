@@ -1,9 +1,12 @@
 import asyncio
+import hashlib
+import time
 import aiohttp
 import logging
-from typing import List, Dict, Optional, Any
+import orjson
+from collections import OrderedDict
+from typing import AsyncIterator, List, Dict, Optional, Any
 from functools import lru_cache
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -12,6 +15,42 @@ class OllamaServiceError(Exception):
     """Custom exception for Ollama service errors"""
     pass
 
+# One ClientSession per process: tearing sessions down discards warm
+# keep-alive connections, so health checks and generate calls would pay
+# a fresh TCP handshake. The lock is created lazily so it binds to the
+# running loop.
+_shared_session: Optional[aiohttp.ClientSession] = None
+_session_lock: Optional[asyncio.Lock] = None
+
+async def _get_shared_session(timeout: int) -> aiohttp.ClientSession:
+    """Return the process-wide HTTP session, creating it on first use"""
+    global _shared_session, _session_lock
+    if _shared_session is not None and not _shared_session.closed:
+        return _shared_session
+
+    if _session_lock is None:
+        _session_lock = asyncio.Lock()
+
+    async with _session_lock:
+        if _shared_session is None or _shared_session.closed:
+            _shared_session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=timeout),
+                connector=aiohttp.TCPConnector(
+                    limit=32,
+                    limit_per_host=16,
+                    keepalive_timeout=75,
+                    enable_cleanup_closed=True
+                )
+            )
+    return _shared_session
+
+async def close_shared_session():
+    """Close the process-wide HTTP session (app shutdown only)"""
+    global _shared_session
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+
 class OllamaService:
     """Async service for Ollama API interactions"""
 
@@ -22,45 +61,50 @@ class OllamaService:
         self._circuit_breaker_failures = 0
         self._circuit_breaker_threshold = 5
         self._circuit_breaker_reset_time = 60
-        self._last_failure_time = 0
+        self._last_failure_time = 0.0
         self._model_cache = None
         self._cache_timestamp = None
         self._cache_duration = 300  # 5 minutes
+        self._models_lock = asyncio.Lock()
+        # Exact-match response cache: inference is seconds on a local
+        # model, so repeat prompts are worth orders of magnitude more
+        # than any transport optimization. OrderedDict gives LRU
+        # eviction; keys hash model + prompt + context + options.
+        self._response_cache: OrderedDict = OrderedDict()
+        self._response_cache_max = 128
 
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=self.timeout),
-            connector=aiohttp.TCPConnector(limit=10, limit_per_host=5)
-        )
+        self.session = await _get_shared_session(self.timeout)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Async context manager exit
+
+        Drops this instance's reference only; the shared session stays
+        open so its keep-alive connections survive for other callers.
+        """
+        self.session = None
 
     async def initialize(self):
-        """Initialize the service and create session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=self.timeout),
-                connector=aiohttp.TCPConnector(limit=10, limit_per_host=5)
-            )
+        """Initialize the service and bind the shared session"""
+        if not self.session or self.session.closed:
+            self.session = await _get_shared_session(self.timeout)
             logger.info(f"OllamaService initialized with URL: {self.base_url}")
 
     async def close(self):
-        """Close the service and cleanup session"""
+        """Close the service and the shared session (app shutdown)"""
         if self.session:
-            await self.session.close()
             self.session = None
+            await close_shared_session()
             logger.info("OllamaService closed")
 
     def _is_circuit_breaker_open(self) -> bool:
         """Check if circuit breaker is open"""
         if self._circuit_breaker_failures >= self._circuit_breaker_threshold:
-            if asyncio.get_event_loop().time() - self._last_failure_time < self._circuit_breaker_reset_time:
+            # time.monotonic() instead of loop.time(): no event-loop
+            # lookup per call and the clock survives loop restarts
+            if time.monotonic() - self._last_failure_time < self._circuit_breaker_reset_time:
                 return True
             else:
                 # Reset circuit breaker
@@ -70,19 +114,20 @@ class OllamaService:
     def _record_failure(self):
         """Record a failure for circuit breaker"""
         self._circuit_breaker_failures += 1
-        self._last_failure_time = asyncio.get_event_loop().time()
+        self._last_failure_time = time.monotonic()
 
     def _record_success(self):
         """Record a success for circuit breaker"""
         self._circuit_breaker_failures = 0
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError))
-    )
     async def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Make HTTP request with retry logic"""
+        """Make HTTP request with retry logic
+
+        The retry is a plain loop (3 attempts, exponential backoff)
+        rather than a tenacity decorator: the decorator's wrapper state
+        costs more than the request handling itself on the common
+        first-try success against a local Ollama.
+        """
         if self._is_circuit_breaker_open():
             raise OllamaServiceError("Circuit breaker is open - service temporarily unavailable")
 
@@ -90,59 +135,120 @@ class OllamaService:
             raise OllamaServiceError("Session not initialized - use async context manager")
 
         url = f"{self.base_url}{endpoint}"
+        delay = 4.0
 
-        try:
-            async with self.session.request(method, url, **kwargs) as response:
-                if response.status == 200:
-                    self._record_success()
-                    return await response.json()
-                elif response.status == 404:
-                    raise OllamaServiceError(f"Endpoint not found: {endpoint}")
-                else:
-                    error_text = await response.text()
-                    raise OllamaServiceError(f"HTTP {response.status}: {error_text}")
-
-        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-            self._record_failure()
-            logger.error(f"Request failed for {url}: {str(e)}")
-            raise
+        for attempt in range(3):
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    if response.status == 200:
+                        self._record_success()
+                        # orjson decodes the buffered body faster than the
+                        # stdlib parser behind response.json()
+                        return orjson.loads(await response.read())
+                    elif response.status == 404:
+                        raise OllamaServiceError(f"Endpoint not found: {endpoint}")
+                    else:
+                        error_text = await response.text()
+                        raise OllamaServiceError(f"HTTP {response.status}: {error_text}")
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._record_failure()
+                logger.error(f"Request failed for {url}: {str(e)}")
+                if attempt == 2:
+                    raise
+                await asyncio.sleep(min(delay, 10))
+                delay *= 2
 
     async def check_health(self) -> bool:
         """Check if Ollama service is healthy"""
+        if not self.session:
+            return False
+
         try:
-            await self._make_request('GET', '/api/tags')
-            return True
+            # Lightweight probe on the pooled keep-alive connection; skips
+            # the retry/backoff wrapper so health checks fail fast instead
+            # of stacking exponential waits
+            async with self.session.get(
+                f"{self.base_url}/api/version",
+                timeout=aiohttp.ClientTimeout(total=1.0)
+            ) as response:
+                return response.status == 200
         except Exception as e:
             logger.warning(f"Health check failed: {str(e)}")
             return False
 
-    async def get_models(self, use_cache: bool = True) -> List[str]:
-        """Get list of available models from Ollama with caching"""
-        import time
-
-        # Check cache if enabled
+    def _cached_models(self, use_cache: bool) -> Optional[tuple]:
+        """Return the cached model tuple if still fresh, else None"""
         if use_cache and self._model_cache is not None and self._cache_timestamp is not None:
             if time.time() - self._cache_timestamp < self._cache_duration:
-                logger.debug("Returning cached models")
                 return self._model_cache
+        return None
 
-        try:
-            response = await self._make_request('GET', '/api/tags')
-            models = [model['name'] for model in response.get('models', [])]
-            logger.info(f"Retrieved {len(models)} models from Ollama")
+    async def get_models(self, use_cache: bool = True) -> List[str]:
+        """Get list of available models from Ollama with caching"""
+        cached = self._cached_models(use_cache)
+        if cached is not None:
+            logger.debug("Returning cached models")
+            return list(cached)
 
-            # Update cache
-            self._model_cache = models
-            self._cache_timestamp = time.time()
+        # Single-flight: concurrent cache misses share one HTTP call
+        async with self._models_lock:
+            cached = self._cached_models(use_cache)
+            if cached is not None:
+                return list(cached)
 
-            return models
-        except Exception as e:
-            logger.error(f"Failed to get models: {str(e)}")
-            # Return cached models if available, otherwise empty list
-            return self._model_cache if self._model_cache is not None else []
+            try:
+                response = await self._make_request('GET', '/api/tags')
+                models = [model['name'] for model in response.get('models', [])]
+                logger.info(f"Retrieved {len(models)} models from Ollama")
+
+                # Cache as a tuple so callers can't mutate it in place
+                self._model_cache = tuple(models)
+                self._cache_timestamp = time.time()
+
+                return models
+            except Exception as e:
+                logger.error(f"Failed to get models: {str(e)}")
+                # Return cached models if available, otherwise empty list
+                return list(self._model_cache) if self._model_cache is not None else []
+
+    def _response_cache_key(self, model: str, prompt: str,
+                            context: Optional[List[Dict[str, str]]], kwargs: dict) -> bytes:
+        """Hash the full generation request into a fixed-size cache key"""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(model.encode())
+        h.update(b'\x00')
+        h.update(prompt.encode())
+        h.update(b'\x00')
+        if context:
+            h.update(orjson.dumps(context))
+        if kwargs:
+            h.update(orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS))
+        return h.digest()
 
     async def generate_response(self, model: str, prompt: str, context: List[Dict[str, str]] = None, **kwargs) -> str:
-        """Generate response from Ollama model with optional conversation context"""
+        """Generate response from Ollama model with optional conversation context
+
+        Identical (model, prompt, context, options) requests are served
+        from a small LRU cache instead of re-running inference.
+        """
+        cache_key = self._response_cache_key(model, prompt, context, kwargs)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            self._response_cache.move_to_end(cache_key)
+            logger.debug("Response cache hit for model %s", model)
+            return cached
+
+        response_text = await self._generate_uncached(model, prompt, context, **kwargs)
+
+        self._response_cache[cache_key] = response_text
+        if len(self._response_cache) > self._response_cache_max:
+            self._response_cache.popitem(last=False)
+
+        return response_text
+
+    async def _generate_uncached(self, model: str, prompt: str, context: List[Dict[str, str]] = None, **kwargs) -> str:
+        """Run actual inference through Ollama's chat/generate APIs"""
 
         # If context is provided, use chat API for better conversation handling
         if context and len(context) > 0:
@@ -184,6 +290,59 @@ class OllamaService:
             logger.error(f"Failed to generate response: {str(e)}")
             raise OllamaServiceError(f"Generation failed: {str(e)}")
 
+    async def stream_response(self, model: str, prompt: str, context: List[Dict[str, str]] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream response chunks from Ollama as they are generated
+
+        Yields text fragments as Ollama produces them instead of
+        buffering the full reply; the caller is responsible for joining
+        and persisting the final text.
+        """
+        if self._is_circuit_breaker_open():
+            raise OllamaServiceError("Circuit breaker is open - service temporarily unavailable")
+
+        if not self.session:
+            raise OllamaServiceError("Session not initialized - use async context manager")
+
+        # Mirror generate_response: chat API when context is available,
+        # generate API otherwise
+        if context and len(context) > 0:
+            messages = context.copy()
+            messages.append({"role": "user", "content": prompt})
+            endpoint = '/api/chat'
+            payload = {'model': model, 'messages': messages, 'stream': True, **kwargs}
+        else:
+            endpoint = '/api/generate'
+            payload = {'model': model, 'prompt': prompt, 'stream': True, **kwargs}
+
+        url = f"{self.base_url}{endpoint}"
+
+        try:
+            async with self.session.post(url, json=payload) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise OllamaServiceError(f"HTTP {response.status}: {error_text}")
+
+                # Ollama streams one JSON object per line
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    data = orjson.loads(line)
+                    if endpoint == '/api/chat':
+                        chunk = data.get('message', {}).get('content', '')
+                    else:
+                        chunk = data.get('response', '')
+                    if chunk:
+                        yield chunk
+                    if data.get('done'):
+                        break
+
+                self._record_success()
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._record_failure()
+            logger.error(f"Streaming request failed for {url}: {str(e)}")
+            raise OllamaServiceError(f"Streaming failed: {str(e)}")
+
     async def pull_model(self, model: str) -> bool:
         """Pull a model from Ollama registry"""
         try:
@@ -194,25 +353,29 @@ class OllamaService:
             logger.error(f"Failed to pull model {model}: {str(e)}")
             return False
 
-    def get_popular_models(self) -> List[str]:
+    def get_popular_models(self) -> tuple:
         """Get list of popular Ollama models"""
-        return [
-            "mistral",
-            "llama3",
-            "llama3.1",
-            "llama3.2",
-            "llama2",
-            "codellama",
-            "phi3",
-            "gemma2",
-            "qwen2.5",
-            "deepseek-coder",
-            "nomic-embed-text",
-            "all-minilm",
-            "tinyllama",
-            "orca-mini",
-            "vicuna"
-        ]
+        return POPULAR_MODELS
+
+# Static enumeration shared by every caller; a tuple built once instead
+# of a list reallocated per request.
+POPULAR_MODELS = (
+    "mistral",
+    "llama3",
+    "llama3.1",
+    "llama3.2",
+    "llama2",
+    "codellama",
+    "phi3",
+    "gemma2",
+    "qwen2.5",
+    "deepseek-coder",
+    "nomic-embed-text",
+    "all-minilm",
+    "tinyllama",
+    "orca-mini",
+    "vicuna"
+)
 
 # Global service instance
 ollama_service = OllamaService()
\ No newline at end of file
@@ -1,14 +1,15 @@
 import time
 import asyncio
 from typing import Dict, Optional
-from collections import defaultdict, deque
 from dataclasses import dataclass
 from config import config
 import logging
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# slots drops the per-instance __dict__ (one of these is allocated per
+# rate-limit check); frozen makes instances safely shareable
+@dataclass(slots=True, frozen=True)
 class RateLimitInfo:
     """Information about rate limit status"""
     allowed: bool
@@ -23,22 +24,29 @@ class TokenBucket:
         self.capacity = capacity
         self.tokens = capacity
         self.refill_rate = refill_rate  # tokens per second
-        self.last_refill = time.time()
-        self._lock = asyncio.Lock()
+        self.last_refill = time.monotonic()
 
     async def consume(self, tokens: int = 1) -> bool:
-        """Try to consume tokens from the bucket"""
-        async with self._lock:
-            now = time.time()
-            # Add tokens based on time elapsed
-            time_passed = now - self.last_refill
-            self.tokens = min(self.capacity, self.tokens + time_passed * self.refill_rate)
-            self.last_refill = now
-
-            if self.tokens >= tokens:
-                self.tokens -= tokens
-                return True
-            return False
+        """Try to consume tokens from the bucket
+
+        The body has no suspension points, so on a single event loop it
+        runs atomically — no lock needed (the old asyncio.Lock cost two
+        awaits per check for nothing). The token count is reconstructed
+        from the monotonic clock, so wall-clock jumps can't refill or
+        drain the bucket.
+        """
+        now = time.monotonic()
+        # Work on locals — each self.x is a dict lookup, and this method
+        # runs once per rate-limit check
+        available = min(self.capacity,
+                        self.tokens + (now - self.last_refill) * self.refill_rate)
+        self.last_refill = now
+
+        if available >= tokens:
+            self.tokens = available - tokens
+            return True
+        self.tokens = available
+        return False
 
     def get_wait_time(self, tokens: int = 1) -> float:
         """Get time to wait before tokens are available"""
@@ -48,42 +56,80 @@ class TokenBucket:
         return needed_tokens / self.refill_rate
 
 class SlidingWindowRateLimiter:
-    """Sliding window rate limiter"""
+    """Sliding window rate limiter
+
+    Uses the weighted two-bucket counter (current window count plus the
+    previous window's count scaled by its remaining overlap) instead of
+    a per-request timestamp deque: every check is O(1) time and each
+    identifier costs three numbers, not up to max_requests floats.
+    """
+
+    _SHARDS = 16
 
     def __init__(self, max_requests: int, window_size: int):
         self.max_requests = max_requests
         self.window_size = window_size  # in seconds
-        self.requests: Dict[str, deque] = defaultdict(deque)
-        self._lock = asyncio.Lock()
-
-    async def is_allowed(self, identifier: str) -> RateLimitInfo:
-        """Check if request is allowed for the identifier"""
-        async with self._lock:
-            now = time.time()
-            window_start = now - self.window_size
-
-            # Clean old requests
-            user_requests = self.requests[identifier]
-            while user_requests and user_requests[0] < window_start:
-                user_requests.popleft()
-
-            # Check if under limit
-            if len(user_requests) < self.max_requests:
-                user_requests.append(now)
-                remaining = self.max_requests - len(user_requests)
+        # State sharded by identifier hash so one busy IP's check never
+        # waits on another's lock; each shard maps
+        # identifier -> [bucket_index, current_count, previous_count],
+        # mutated in place
+        self._shards = [
+            ({}, asyncio.Lock()) for _ in range(self._SHARDS)
+        ]
+
+    async def is_allowed(self, identifier: str, count: int = 1,
+                         now: float = None) -> RateLimitInfo:
+        """Check if request is allowed for the identifier
+
+        count > 1 replays a batch of requests that were already admitted
+        locally (see LocalTokenBucket) in a single locked pass. Callers
+        that already read the clock this iteration pass it via now.
+        """
+        requests, lock = self._shards[hash(identifier) & (self._SHARDS - 1)]
+        # Bound once: every self.x below would be a dict lookup on a
+        # per-request path
+        window = self.window_size
+        max_requests = self.max_requests
+        async with lock:
+            if now is None:
+                now = time.time()
+            bucket = int(now // window)
+
+            state = requests.get(identifier)
+            if state is None:
+                state = [bucket, 0, 0]
+                requests[identifier] = state
+            elif bucket != state[0]:
+                # Roll the window: last bucket becomes the weighted
+                # previous; anything older contributes nothing
+                state[2] = state[1] if bucket - state[0] == 1 else 0
+                state[1] = 0
+                state[0] = bucket
+
+            # Previous bucket counts in proportion to how much of it
+            # still overlaps the sliding window
+            frac_elapsed = (now - bucket * window) / window
+            estimated = state[2] * (1.0 - frac_elapsed) + state[1]
+            reset_time = (bucket + 1) * window
+
+            if estimated + count <= max_requests:
+                state[1] += count
                 return RateLimitInfo(
                     allowed=True,
-                    remaining=remaining,
-                    reset_time=now + self.window_size
+                    remaining=int(max_requests - estimated - count),
+                    reset_time=reset_time
                 )
             else:
-                # Calculate retry after time
-                oldest_request = user_requests[0]
-                retry_after = oldest_request + self.window_size - now
+                # Locally admitted requests in the batch already happened;
+                # record them and deny only the current one
+                if count > 1:
+                    state[1] += count - 1
+
+                retry_after = reset_time - now
                 return RateLimitInfo(
                     allowed=False,
                     remaining=0,
-                    reset_time=oldest_request + self.window_size,
+                    reset_time=reset_time,
                     retry_after=max(0, retry_after)
                 )
 
@@ -100,10 +146,13 @@ class AdaptiveRateLimiter:
         self.limiter = SlidingWindowRateLimiter(self.current_limit, window_size)
         self._lock = asyncio.Lock()
 
-    async def is_allowed(self, identifier: str) -> RateLimitInfo:
+    async def is_allowed(self, identifier: str, count: int = 1,
+                         now: float = None) -> RateLimitInfo:
         """Check if request is allowed with adaptive limiting"""
-        await self._adjust_limit()
-        return await self.limiter.is_allowed(identifier)
+        if now is None:
+            now = time.time()
+        await self._adjust_limit(now)
+        return await self.limiter.is_allowed(identifier, count, now)
 
     async def record_success(self):
         """Record a successful request"""
@@ -115,10 +164,12 @@ class AdaptiveRateLimiter:
         async with self._lock:
             self.error_count += 1
 
-    async def _adjust_limit(self):
+    async def _adjust_limit(self, now: float):
         """Adjust rate limit based on error rate"""
+        # Cheap pre-check without the lock; re-verified inside
+        if now - self.last_adjustment < 60:
+            return
         async with self._lock:
-            now = time.time()
             if now - self.last_adjustment < 60:  # Adjust every minute
                 return
 
@@ -141,7 +192,12 @@ class AdaptiveRateLimiter:
 
             if new_limit != self.current_limit:
                 self.current_limit = new_limit
-                self.limiter = SlidingWindowRateLimiter(self.current_limit, self.window_size)
+                # Adjust the live limiter rather than rebuilding it;
+                # is_allowed reads max_requests per call, and keeping
+                # the per-identifier window state means a lowered limit
+                # takes effect immediately instead of after a fresh
+                # limiter forgets everyone's counts
+                self.limiter.max_requests = new_limit
 
             # Reset counters
             self.success_count = 0
@@ -170,17 +226,18 @@ class GlobalRateLimiter:
             window_size=60
         )
 
-    async def check_ip_limit(self, ip: str) -> RateLimitInfo:
+    async def check_ip_limit(self, ip: str, now: float = None) -> RateLimitInfo:
         """Check rate limit for specific IP"""
-        return await self.ip_limiter.is_allowed(ip)
+        return await self.ip_limiter.is_allowed(ip, now=now)
 
-    async def check_global_limit(self) -> bool:
+    async def check_global_limit(self, tokens: int = 1) -> bool:
         """Check global rate limit"""
-        return await self.global_limiter.consume()
+        return await self.global_limiter.consume(tokens)
 
-    async def check_ollama_limit(self, identifier: str) -> RateLimitInfo:
+    async def check_ollama_limit(self, identifier: str, count: int = 1,
+                                 now: float = None) -> RateLimitInfo:
         """Check rate limit for Ollama requests"""
-        return await self.ollama_limiter.is_allowed(identifier)
+        return await self.ollama_limiter.is_allowed(identifier, count, now)
 
     async def record_ollama_success(self):
         """Record successful Ollama request"""
@@ -193,29 +250,106 @@ class GlobalRateLimiter:
 # Global instance
 rate_limiter = GlobalRateLimiter()
 
-async def check_rate_limit(ip: str, endpoint: str = 'general') -> RateLimitInfo:
-    """Check rate limit for a request"""
-    # Check global limit first
-    if not await rate_limiter.check_global_limit():
+# Tokens a client may spend locally between reconciliations, and the
+# maximum age of a local grant before the shared limiters are consulted
+# again. Keeping the grant a fraction of the shared remaining bounds
+# how far the local view can drift from the shared one.
+_LOCAL_GRANT = 100
+_SYNC_INTERVAL = 5.0
+
+class LocalTokenBucket:
+    """Per-worker bucket fronting the lock-guarded shared limiters
+
+    The shared limiters serialize every request on asyncio locks. This
+    bucket partially partitions the counters: each (ip, endpoint) pair
+    gets a local grant carved out of the shared remaining budget, and
+    requests within the grant are admitted with plain attribute updates
+    — no lock, no await. Spent tokens are replayed into the shared
+    limiters in one batch every _LOCAL_GRANT requests or _SYNC_INTERVAL
+    seconds, whichever comes first. The event loop runs the hot path
+    without suspension points, so no per-bucket lock is needed.
+    """
+
+    __slots__ = ('tokens', 'grant', 'rate', 'last', 'consumed',
+                 'last_sync', 'shared_remaining', 'reset_time')
+
+    def __init__(self, rate: float, now: float):
+        self.tokens = 0.0       # first request always goes through the shared path
+        self.grant = 0
+        self.rate = rate        # tokens per second
+        self.last = now
+        self.consumed = 0       # locally admitted since last reconciliation
+        self.last_sync = now
+        self.shared_remaining = 0
+        self.reset_time = now + 60
+
+_local_buckets: Dict[tuple, LocalTokenBucket] = {}
+
+async def _reconcile(bucket: LocalTokenBucket, ip: str, endpoint: str, now: float) -> RateLimitInfo:
+    """Replay locally admitted requests into the shared limiters
+
+    Consumes the batch (plus the current request) from the shared
+    stores in one locked pass, then hands the bucket a fresh local
+    grant sized from the shared remaining budget.
+    """
+    batch = bucket.consumed + 1
+    bucket.consumed = 0
+    bucket.last_sync = now
+
+    if not await rate_limiter.check_global_limit(batch):
+        bucket.tokens = 0.0
+        bucket.grant = 0
         return RateLimitInfo(
             allowed=False,
             remaining=0,
-            reset_time=time.time() + 60,
+            reset_time=now + 60,
             retry_after=60
         )
 
-    # Check IP-specific limit
-    ip_result = await rate_limiter.check_ip_limit(ip)
-    if not ip_result.allowed:
-        return ip_result
+    result = await rate_limiter.ip_limiter.is_allowed(ip, batch, now)
 
-    # Check endpoint-specific limits
-    if endpoint == 'ollama':
-        ollama_result = await rate_limiter.check_ollama_limit(ip)
-        if not ollama_result.allowed:
-            return ollama_result
+    if result.allowed and endpoint == 'ollama':
+        result = await rate_limiter.check_ollama_limit(ip, batch, now)
+
+    if result.allowed:
+        bucket.grant = min(_LOCAL_GRANT, result.remaining)
+    else:
+        bucket.grant = 0
 
-    return ip_result
+    bucket.tokens = float(bucket.grant)
+    bucket.last = now
+    bucket.shared_remaining = result.remaining
+    bucket.reset_time = result.reset_time
+    return result
+
+async def check_rate_limit(ip: str, endpoint: str = 'general') -> RateLimitInfo:
+    """Check rate limit for a request"""
+    now = time.time()
+    key = (ip, endpoint)
+
+    bucket = _local_buckets.get(key)
+    if bucket is None:
+        bucket = LocalTokenBucket(config.RATE_LIMIT_REQUESTS_PER_MINUTE / 60, now)
+        _local_buckets[key] = bucket
+
+    # Hot path: spend a locally granted token without touching the
+    # shared limiters or their locks
+    elapsed = now - bucket.last
+    if elapsed > 0:
+        bucket.tokens = min(float(bucket.grant), bucket.tokens + elapsed * bucket.rate)
+        bucket.last = now
+
+    if bucket.tokens >= 1 and now - bucket.last_sync < _SYNC_INTERVAL:
+        bucket.tokens -= 1
+        bucket.consumed += 1
+        return RateLimitInfo(
+            allowed=True,
+            remaining=max(0, bucket.shared_remaining - bucket.consumed),
+            reset_time=bucket.reset_time
+        )
+
+    # Slow path: grant exhausted or stale — reconcile with the shared store
+    return await _reconcile(bucket, ip, endpoint, now)
 
 async def record_request_result(success: bool, endpoint: str = 'general'):
     """Record the result of a request for adaptive limiting"""
@@ -225,15 +359,20 @@ async def record_request_result(success: bool, endpoint: str = 'general'):
         else:
             await rate_limiter.record_ollama_error()
 
+_XFF = 'X-Forwarded-For'
+_XRI = 'X-Real-IP'
+
 def get_client_ip(request) -> str:
     """Extract client IP from request"""
     # Check for forwarded headers first
-    forwarded_for = request.headers.get('X-Forwarded-For')
+    forwarded_for = request.headers.get(_XFF)
     if forwarded_for:
-        # Take the first IP in the chain
-        return forwarded_for.split(',')[0].strip()
+        # Take the first IP in the chain; partition stops at the first
+        # comma and avoids split()'s list allocation
+        first, _, _ = forwarded_for.partition(',')
+        return first.strip()
 
-    real_ip = request.headers.get('X-Real-IP')
+    real_ip = request.headers.get(_XRI)
     if real_ip:
         return real_ip
 
@@ -4,58 +4,56 @@ This module provides timezone-aware datetime functions to ensure consistent
 timestamp handling across the application using the configured timezone.
 """
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
-import pytz
+from zoneinfo import ZoneInfo
 from config import config
 
+# Resolved once at import; zoneinfo keys are cached and C-backed, so
+# conversions through _TZ are cheap on hot paths
+_TZ = ZoneInfo(config.TIMEZONE)
+
 
 def get_timezone():
     """Get the configured timezone object."""
-    return pytz.timezone(config.TIMEZONE)
+    return _TZ
 
 
 def now_local() -> datetime:
     """Get current datetime in the configured timezone."""
-    tz = get_timezone()
-    return datetime.now(tz)
+    return datetime.now(_TZ)
 
 
 def utc_to_local(utc_dt: datetime) -> datetime:
     """Convert UTC datetime to local timezone."""
     if utc_dt.tzinfo is None:
-        utc_dt = utc_dt.replace(tzinfo=pytz.UTC)
-    elif utc_dt.tzinfo != pytz.UTC:
-        utc_dt = utc_dt.astimezone(pytz.UTC)
-    
-    tz = get_timezone()
-    return utc_dt.astimezone(tz)
+        utc_dt = utc_dt.replace(tzinfo=timezone.utc)
+
+    return utc_dt.astimezone(_TZ)
 
 
 def local_to_utc(local_dt: datetime) -> datetime:
     """Convert local timezone datetime to UTC."""
-    tz = get_timezone()
     if local_dt.tzinfo is None:
-        local_dt = tz.localize(local_dt)
-    
-    return local_dt.astimezone(pytz.UTC)
+        local_dt = local_dt.replace(tzinfo=_TZ)
+
+    return local_dt.astimezone(timezone.utc)
 
 
 def format_local_datetime(dt: Optional[datetime] = None, format_str: str = "%Y-%m-%d %H:%M:%S") -> str:
     """Format datetime in local timezone."""
     if dt is None:
         dt = now_local()
-    elif dt.tzinfo is None or dt.tzinfo != get_timezone():
+    elif dt.tzinfo is None or dt.tzinfo != _TZ:
         dt = utc_to_local(dt)
-    
+
     return dt.strftime(format_str)
 
 
 def parse_local_datetime(dt_str: str, format_str: str = "%Y-%m-%d %H:%M:%S") -> datetime:
     """Parse datetime string as local timezone."""
     dt = datetime.strptime(dt_str, format_str)
-    tz = get_timezone()
-    return tz.localize(dt)
+    return dt.replace(tzinfo=_TZ)
 
 
 def get_local_timestamp() -> float:
@@ -65,5 +63,4 @@ def get_local_timestamp() -> float:
 
 def timestamp_to_local(timestamp: float) -> datetime:
     """Convert timestamp to local timezone datetime."""
-    utc_dt = datetime.fromtimestamp(timestamp, tz=pytz.UTC)
-    return utc_to_local(utc_dt)
\ No newline at end of file
+    return datetime.fromtimestamp(timestamp, tz=_TZ)